@@ -1,3 +1,4 @@
+import io
 import os
 import cv2
 import json
@@ -5,9 +6,11 @@ import numpy as np
 import streamlit as st
 from PIL import Image
 from dotenv import load_dotenv
-from ultralytics import YOLO
 from crewai import Agent, Task, Crew
-from openai import OpenAI
+from llm_client import crew_llm, stream_chat
+from inference_pool import INFERENCE_TIMEOUT, InferencePool
+from session_store import Detection, Rendered, SpatialAnalytics, get_store, hash_bytes
+from scene_analytics import density_heatmap, occupancy_grid, render_heatmap, scene_summary
 
 # =========================================================
 # 🔹 Load environment variables
@@ -22,8 +25,17 @@ MODEL_PATH = os.getenv(
 
 DEFAULT_IMG_PATH = r"C:\Desktop\vision_agent\data\raw\Cars Detection\valid\images\4c40c429a5a070e8_jpg.rf.L1Ey33Unmsn2ItPAAJFF.jpg"
 
-# 🔹 Initialize YOLO
-model = YOLO(MODEL_PATH)
+# 🔹 Initialize YOLO worker pool (shared by every session)
+@st.cache_resource(show_spinner=False)
+def load_inference_pool():
+    pool = InferencePool(MODEL_PATH)
+    try:
+        # Surface a bad MODEL_PATH / broken install now, not as a hung spinner
+        pool.wait_ready()
+    except Exception:
+        pool.close()
+        raise
+    return pool
 
 # =========================================================
 # 🔹 Streamlit UI Configuration
@@ -131,31 +143,68 @@ with col1:
         help="Upload vehicle images for AI analysis"
     )
 
+store = get_store()
+
 if uploaded is not None:
     st.success(f"✅ Using uploaded image: `{uploaded.name}`")
-    img = Image.open(uploaded).convert("RGB")
+    img_bytes = uploaded.getvalue()
 else:
     st.info(f"🖼 No image uploaded — using dataset image: `{os.path.basename(DEFAULT_IMG_PATH)}`")
-    img = Image.open(DEFAULT_IMG_PATH).convert("RGB")
+    with open(DEFAULT_IMG_PATH, "rb") as f:
+        img_bytes = f.read()
 
-img_array = np.array(img)
+store.image_hash = hash_bytes(img_bytes)
+img_array = store.image.get(
+    store.image_hash,
+    lambda: np.array(Image.open(io.BytesIO(img_bytes)).convert("RGB"))
+)
 
 # =========================================================
 # 🔹 Object Detection
 # =========================================================
-with st.spinner("🔍 Running object detection... Please wait"):
-    results = model(img_array, conf=confidence_threshold)
-    res_img = results[0].plot()
+def run_detection():
+    with st.spinner("🔍 Running object detection... Please wait"):
+        pool = load_inference_pool()
+        try:
+            return Detection(**pool.predict(img_array, conf=confidence_threshold, timeout=INFERENCE_TIMEOUT))
+        except Exception:
+            # Don't keep a broken pool cached for every other session
+            if not pool.healthy:
+                load_inference_pool.clear()
+                pool.close()
+            raise
+
+
+def render_images():
+    res_img = detection.plot
+    display_img = img_array
+    if resize_option:
+        res_img = cv2.resize(res_img, (600, 400))
+        display_img = cv2.resize(img_array, (600, 400))
+    _, buffer = cv2.imencode('.jpg', res_img)
+    return Rendered(original=display_img, result=res_img, jpeg_bytes=buffer.tobytes())
+
+
+def run_spatial_analytics():
+    image_size = (img_array.shape[1], img_array.shape[0])
+    return SpatialAnalytics(
+        summary=scene_summary(detection.boxes, detection.class_ids, detection.names, image_size),
+        heatmap=density_heatmap(detection.boxes, image_size),
+        occupancy=occupancy_grid(detection.boxes, image_size)
+    )
+
 
-if resize_option:
-    res_img = cv2.resize(res_img, (600, 400))
+detection_key = (store.image_hash, confidence_threshold)
+detection = store.detection.get(detection_key, run_detection)
+rendered = store.rendered.get((detection_key, resize_option), render_images)
+spatial = store.spatial.get(detection_key, run_spatial_analytics)
+res_img = rendered.result
 
 col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("📷 Original Image")
-    display_img = cv2.resize(np.array(img), (600, 400)) if resize_option else np.array(img)
-    st.image(display_img, use_container_width=False)
+    st.image(rendered.original, use_container_width=False)
 
 with col2:
     st.subheader("🎯 Detection Results")
@@ -167,23 +216,11 @@ with col2:
 st.markdown("---")
 st.subheader("📊 Detection Analytics")
 
-detections_json = results[0].to_json()
-detections = json.loads(detections_json)
-
-counts = {}
-confidence_scores = {}
-
-for obj in detections:
-    name = obj.get("name", "unknown")
-    counts[name] = counts.get(name, 0) + 1
-
-    if name not in confidence_scores:
-        confidence_scores[name] = []
-    confidence_scores[name].append(obj.get("confidence", 0))
+counts = detection.counts()
+confidence_scores = detection.confidence_scores()
+total_objects = sum(counts.values())
 
 if counts:
-    total_objects = sum(counts.values())
-
     metric_col1, metric_col2, metric_col3 = st.columns(3)
     with metric_col1:
         st.metric("Total Objects Detected", total_objects)
@@ -209,81 +246,102 @@ if counts:
     chart_data = {"Class": list(counts.keys()), "Count": list(counts.values())}
     st.bar_chart(chart_data, x="Class", y="Count")
 
+    st.markdown("#### 🗺️ Spatial Layout")
+    map_col, stats_col = st.columns([3, 2])
+    with map_col:
+        st.image(render_heatmap(rendered.original, spatial.heatmap), caption="Detection density")
+    with stats_col:
+        st.metric("Occupancy", f"{spatial.summary['occupancy_ratio']:.1%}")
+        st.metric("Densest Region", spatial.summary["densest_region"].replace("-", " / ").title())
+        lanes = spatial.summary["lanes"]
+        lane_data = {"Lane": [lane.title() for lane in lanes], "Count": [sum(c.values()) for c in lanes.values()]}
+        st.bar_chart(lane_data, x="Lane", y="Count")
+
 else:
     st.warning("⚠️ No objects detected in this image. Try adjusting the confidence threshold or using a different image.")
 
 # =========================================================
 # 🔹 CrewAI Multi-Agent Analysis
 # =========================================================
-try:
-    st.markdown("---")
-    st.subheader("🤖 Agent Analysis")
+def run_analysis():
+    # The vision step is streamed straight through the pooled client; the
+    # crew then builds insights and the JSON report on top of its summary.
+    st.markdown("### 🧠 Scene Summary")
+    summary_messages = [
+        {"role": "system", "content": "You are a Vision Analyst. Summarize YOLO detection results into plain language."},
+        {"role": "user", "content": f"Detected objects and spatial layout: {scene}. Write a human-readable summary (2 lines)."},
+    ]
+    summary_text = st.write_stream(stream_chat(Openai_key, summary_messages))
+
+    llm = crew_llm(Openai_key)
+
+    insight_agent = Agent(
+        role="Environment Analyst",
+        goal="Provide contextual insights about traffic, vehicles, or crowd density.",
+        backstory="Understands city and transport scenes deeply.",
+        llm=llm
+    )
 
-    if not Openai_key:
-        st.warning("⚠️ Please enter your OpenAI API key in the sidebar to enable CrewAI summary.")
-    else:
-        client = OpenAI(api_key=Openai_key)
+    report_agent = Agent(
+        role="Report Compiler",
+        goal="Combine the above results into a concise JSON report.",
+        backstory="Formats analytical insights in structured JSON.",
+        llm=llm
+    )
 
-        vision_agent = Agent(
-            role="Vision Analyst",
-            goal="Summarize YOLO detection results into plain language.",
-            backstory="Expert in analyzing what objects appear in a scene."
-        )
+    insight_task = Task(
+        description="Scene summary: {summary}. Based on it and the lane/occupancy figures in {scene}, generate 2-3 insights about traffic conditions.",
+        expected_output="Short bullet points.",
+        agent=insight_agent
+    )
 
-        insight_agent = Agent(
-            role="Environment Analyst",
-            goal="Provide contextual insights about traffic, vehicles, or crowd density.",
-            backstory="Understands city and transport scenes deeply."
-        )
+    report_task = Task(
+        description="Combine the scene summary ({summary}) + insights into JSON with 'summary' and 'insights' keys.",
+        expected_output="JSON formatted output.",
+        agent=report_agent
+    )
 
-        report_agent = Agent(
-            role="Report Compiler",
-            goal="Combine the above results into a concise JSON report.",
-            backstory="Formats analytical insights in structured JSON."
-        )
+    crew = Crew(
+        agents=[insight_agent, report_agent],
+        tasks=[insight_task, report_task]
+    )
 
-        vision_task = Task(
-            description=f"Detected objects: {counts}. Write a human-readable summary (2 lines).",
-            expected_output="Short text summary.",
-            agent=vision_agent
-        )
+    # Run CrewAI
+    with st.spinner("🤖 Agents are compiling the full report..."):
+        result = crew.kickoff(inputs={"scene": scene, "summary": summary_text})
 
-        insight_task = Task(
-            description="Based on the summary, generate 2-3 insights about traffic conditions.",
-            expected_output="Short bullet points.",
-            agent=insight_agent
-        )
+    # 🛠 Safe result extraction
+    output_data = None
+    if isinstance(result, dict):
+        output_data = result.get("results") or result.get("output") or result
+    else:
+        output_data = result
 
-        report_task = Task(
-            description="Combine summary + insights into JSON with 'summary' and 'insights' keys.",
-            expected_output="JSON formatted output.",
-            agent=report_agent
-        )
+    return {"summary": summary_text, "output": output_data}
 
-        crew = Crew(
-            agents=[vision_agent, insight_agent, report_agent],
-            tasks=[vision_task, insight_task, report_task]
-        )
 
-        # Run CrewAI
-        result = crew.kickoff(inputs={"counts": counts})
+try:
+    st.markdown("---")
+    st.subheader("🤖 Agent Analysis")
 
-        # 🛠 Safe result extraction
-        output_data = None
-        if isinstance(result, dict):
-            output_data = result.get("results") or result.get("output") or result
-        else:
-            output_data = result
+    if not Openai_key:
+        st.warning("⚠️ Please enter your OpenAI API key in the sidebar to enable CrewAI summary.")
+    else:
+        # Only the scene summary and the key feed the agents, so display
+        # toggles and export clicks reuse the previous analysis.
+        scene = json.dumps(spatial.summary)
+        analysis_key = (scene, Openai_key)
+        if store.analysis.is_current(analysis_key):
+            st.markdown("### 🧠 Scene Summary")
+            st.write(store.analysis.value["summary"])
 
-        st.markdown("### 🧠 Scene Summary")
+        analysis = store.analysis.get(analysis_key, run_analysis)
+        output_data = analysis["output"]
 
         try:
             if isinstance(output_data, dict):
-                summary = output_data.get("summary", "No summary found.")
                 insights = output_data.get("insights", [])
 
-                st.write(summary)
-
                 st.markdown("### 💡 Analytical Insights")
                 if insights:
                     for i, insight in enumerate(insights, start=1):
@@ -295,20 +353,19 @@ try:
                 st.json(output_data)
 
             elif isinstance(output_data, list):
-                st.write(output_data[0].get("output", "No summary found."))
-
+                # Task outputs in crew order: insights, then the JSON report
                 st.markdown("### 💡 Analytical Insights")
-                if len(output_data) > 1:
-                    st.write(output_data[1].get("output", "No insights found."))
+                if output_data:
+                    st.write(output_data[0].get("output", "No insights found."))
                 else:
                     st.info("No insights found in CrewAI output.")
 
                 st.markdown("### 📋 JSON Report")
-                if len(output_data) > 2:
+                if len(output_data) > 1:
                     try:
-                        st.json(json.loads(output_data[2].get("output", "{}")))
+                        st.json(json.loads(output_data[1].get("output", "{}")))
                     except Exception:
-                        st.text(output_data[2].get("output", "{}"))
+                        st.text(output_data[1].get("output", "{}"))
                 else:
                     st.info("JSON report not found in CrewAI output.")
 
@@ -333,32 +390,33 @@ st.subheader("📥 Export Results")
 
 exp_col1, exp_col2, exp_col3 = st.columns(3)
 
+# Download buttons read from the session store directly, so a click
+# triggers a single rerun with no detection or agent work.
 with exp_col1:
-    if st.button("💾 Save Detection Image"):
-        _, buffer = cv2.imencode('.jpg', res_img)
-        st.download_button(
-            label="Download Detection Image",
-            data=buffer.tobytes(),
-            file_name="detection_result.jpg",
-            mime="image/jpeg"
-        )
+    st.download_button(
+        label="💾 Download Detection Image",
+        data=rendered.jpeg_bytes,
+        file_name="detection_result.jpg",
+        mime="image/jpeg"
+    )
 
 with exp_col2:
-    if st.button("📊 Export Statistics"):
-        stats = {
-            "total_objects": total_objects if counts else 0,
-            "class_distribution": counts,
-            "confidence_scores": {k: [float(score) for score in v] for k, v in confidence_scores.items()}
-        }
-        st.download_button(
-            label="Download JSON Report",
-            data=json.dumps(stats, indent=2),
-            file_name="detection_report.json",
-            mime="application/json"
-        )
+    stats = {
+        "total_objects": total_objects,
+        "class_distribution": counts,
+        "confidence_scores": {k: [float(score) for score in v] for k, v in confidence_scores.items()},
+        "spatial": spatial.summary
+    }
+    st.download_button(
+        label="📊 Download JSON Report",
+        data=json.dumps(stats, indent=2),
+        file_name="detection_report.json",
+        mime="application/json"
+    )
 
 with exp_col3:
     if st.button("🔄 Reset Session"):
+        store.clear()
         st.rerun()
 
 # =========================================================
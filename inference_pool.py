@@ -0,0 +1,222 @@
+import os
+import queue
+import atexit
+import warnings
+import itertools
+import threading
+import multiprocessing as mp
+from concurrent.futures import Future
+
+# =========================================================
+# 🔹 Pool settings (override via api.env / environment)
+# =========================================================
+# Empty / unset means "size from the cores this process may use"
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS") or 0) or None
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS") or 0) or None
+INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", "64"))
+INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", "60"))
+INFERENCE_STARTUP_TIMEOUT = float(os.getenv("INFERENCE_STARTUP_TIMEOUT", "120"))
+
+# How often the result collector checks that every worker is still alive
+HEALTH_CHECK_INTERVAL = 1.0
+
+# YOLOv8n stops scaling on CPU past a few intra-op threads; more workers pay off instead
+DEFAULT_THREADS_PER_WORKER = 4
+
+
+def available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def plan_workers(workers=None, threads=None, cpus=None):
+    """Split the available cores into one share per worker.
+
+    Returns a list of CPU id lists, one per worker. Each worker later runs
+    torch with ``len(share)`` intra-op threads. Shares never overlap: when an
+    explicit ``workers * threads`` exceeds the cores, it is scaled down with
+    a warning.
+    """
+    cpus = cpus or available_cpus()
+    if threads is None:
+        threads = max(1, len(cpus) // workers) if workers else DEFAULT_THREADS_PER_WORKER
+    threads = min(threads, len(cpus))
+    if workers is None:
+        workers = max(1, len(cpus) // threads)
+    if workers * threads > len(cpus):
+        capped_threads = max(1, len(cpus) // workers)
+        capped_workers = min(workers, len(cpus) // capped_threads)
+        warnings.warn(
+            f"{workers} workers x {threads} threads oversubscribes {len(cpus)} cores; "
+            f"using {capped_workers} x {capped_threads}"
+        )
+        workers, threads = capped_workers, capped_threads
+    return [cpus[i * threads:(i + 1) * threads] for i in range(workers)]
+
+
+def _worker_main(index, model_path, cpus, jobs, results):
+    # Startup is reported as (None, index, error) so the parent fails fast on
+    # a bad MODEL_PATH or a broken torch install instead of waiting forever
+    try:
+        # Pin before torch spins up its thread pool so the threads inherit the mask
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cpus)
+        os.environ["OMP_NUM_THREADS"] = str(len(cpus))
+
+        import torch
+        from ultralytics import YOLO
+
+        torch.set_num_threads(len(cpus))
+        torch.set_num_interop_threads(1)
+        model = YOLO(model_path)
+    except Exception as e:
+        results.put((None, index, RuntimeError(f"worker {index} failed to start: {type(e).__name__}: {e}")))
+        return
+    results.put((None, index, None))
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        job_id, image, conf = job
+        try:
+            res = model(image, conf=conf, verbose=False)[0]
+            payload = {
+                "boxes": res.boxes.xyxy.cpu().numpy(),
+                "confidences": res.boxes.conf.cpu().numpy(),
+                "class_ids": res.boxes.cls.cpu().numpy().astype(int),
+                "names": res.names,
+                "plot": res.plot(),
+            }
+            results.put((job_id, payload, None))
+        except Exception as e:
+            results.put((job_id, None, RuntimeError(f"{type(e).__name__}: {e}")))
+
+
+class InferencePool:
+    """YOLO worker processes behind a shared request queue.
+
+    Each worker is pinned to its own share of cores with a matching
+    ``torch.set_num_threads``, so concurrent Streamlit sessions queue up
+    instead of oversubscribing the CPU.
+    """
+
+    def __init__(self, model_path, workers=INFERENCE_WORKERS, threads=INFERENCE_THREADS,
+                 queue_size=INFERENCE_QUEUE_SIZE):
+        ctx = mp.get_context("spawn")
+        self.shares = plan_workers(workers, threads)
+        self._jobs = ctx.Queue(maxsize=queue_size)
+        self._results = ctx.Queue()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._started = set()
+        self._ready = threading.Event()
+        self._error = None
+        self._closing = False
+
+        self._procs = [
+            ctx.Process(
+                target=_worker_main,
+                args=(i, model_path, share, self._jobs, self._results),
+                name=f"yolo-worker-{i}",
+                daemon=True,
+            )
+            for i, share in enumerate(self.shares)
+        ]
+        for proc in self._procs:
+            proc.start()
+
+        self._collector = threading.Thread(target=self._collect, name="yolo-results", daemon=True)
+        self._collector.start()
+        atexit.register(self.close)
+
+    def _fail(self, error):
+        """Mark the pool broken and fail every request still waiting on it."""
+        with self._lock:
+            if self._error is None:
+                self._error = error
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(self._error)
+        self._ready.set()
+
+    def _check_workers(self):
+        if self._closing or self._error is not None:
+            return
+        for proc in self._procs:
+            if not proc.is_alive():
+                self._fail(RuntimeError(f"{proc.name} exited unexpectedly (exit code {proc.exitcode})"))
+                return
+
+    def _collect(self):
+        while True:
+            try:
+                item = self._results.get(timeout=HEALTH_CHECK_INTERVAL)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            if item is None:
+                break
+            job_id, payload, error = item
+            if job_id is None:
+                # Worker startup report: payload is the worker index
+                if error is not None:
+                    self._fail(error)
+                    continue
+                self._started.add(payload)
+                if len(self._started) == len(self._procs):
+                    self._ready.set()
+                continue
+            with self._lock:
+                future = self._pending.pop(job_id, None)
+            if future is None:
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(payload)
+
+    @property
+    def healthy(self):
+        """False once a worker has died or failed to start."""
+        return self._error is None
+
+    def wait_ready(self, timeout=INFERENCE_STARTUP_TIMEOUT):
+        """Block until every worker has loaded the model; raise if one failed."""
+        if not self._ready.wait(timeout):
+            raise TimeoutError(f"inference workers not ready after {timeout:.0f}s")
+        if self._error is not None:
+            raise self._error
+
+    def submit(self, image, conf=0.25):
+        """Queue one image; blocks while the request queue is full."""
+        future = Future()
+        job_id = next(self._ids)
+        with self._lock:
+            if self._error is not None:
+                raise self._error
+            self._pending[job_id] = future
+        self._jobs.put((job_id, image, conf))
+        return future
+
+    def predict(self, image, conf=0.25, timeout=INFERENCE_TIMEOUT):
+        """Return a dict of boxes, confidences, class_ids, names and plot."""
+        return self.submit(image, conf).result(timeout=timeout)
+
+    def close(self):
+        if not self._procs:
+            return
+        self._closing = True
+        for proc in self._procs:
+            if proc.is_alive():
+                self._jobs.put(None)
+        for proc in self._procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        self._procs = []
+        self._fail(RuntimeError("inference pool is closed"))
+        self._results.put(None)
+        self._collector.join(timeout=5)
@@ -0,0 +1,155 @@
+import os
+import queue
+import random
+import asyncio
+import threading
+
+import httpx
+from openai import (
+    AsyncOpenAI,
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    RateLimitError,
+)
+
+# =========================================================
+# 🔹 LLM settings (override via api.env / environment)
+# =========================================================
+LLM_BASE_URL = os.getenv("LLM_BASE_URL") or os.getenv("OPENAI_BASE_URL") or None
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+
+RETRYABLE_ERRORS = (APIConnectionError, APITimeoutError, InternalServerError, RateLimitError)
+# 429s that backing off cannot fix (billing / quota exhausted)
+NON_RETRYABLE_CODES = {"insufficient_quota"}
+
+_DONE = object()
+
+# One event loop per process, shared by every Streamlit session thread.
+# Clients, connection pools and the concurrency semaphore all live on it.
+_loop = None
+_loop_lock = threading.Lock()
+_clients = {}
+_semaphore = None
+
+
+def _get_loop():
+    global _loop, _semaphore
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-client-loop", daemon=True).start()
+            _semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        return _loop
+
+
+def get_client(api_key, base_url=None):
+    """Return the shared AsyncOpenAI client for this API key / base URL pair."""
+    base_url = base_url or LLM_BASE_URL
+    key = (api_key, base_url)
+    with _loop_lock:
+        client = _clients.get(key)
+        if client is None:
+            http_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(LLM_TIMEOUT, connect=min(LLM_TIMEOUT, 10.0)),
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONCURRENCY,
+                    max_keepalive_connections=LLM_MAX_CONCURRENCY,
+                ),
+            )
+            # Retries are handled in _open_stream so backoff is applied exactly once.
+            client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                http_client=http_client,
+                max_retries=0,
+            )
+            _clients[key] = client
+        return client
+
+
+def crew_llm(api_key, base_url=None):
+    """CrewAI LLM using the same model, endpoint, timeout and retry settings."""
+    from crewai import LLM
+
+    return LLM(
+        model=LLM_MODEL,
+        api_key=api_key,
+        base_url=base_url or LLM_BASE_URL,
+        timeout=LLM_TIMEOUT,
+        max_retries=LLM_MAX_RETRIES,
+    )
+
+
+def _error_code(error):
+    code = getattr(error, "code", None)
+    body = getattr(error, "body", None)
+    if code is None and isinstance(body, dict):
+        code = (body.get("error") or body).get("code")
+    return code
+
+
+def _is_retryable(error):
+    return isinstance(error, RETRYABLE_ERRORS) and _error_code(error) not in NON_RETRYABLE_CODES
+
+
+async def _open_stream(client, messages, model):
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            return await client.chat.completions.create(
+                model=model,
+                messages=messages,
+                stream=True,
+            )
+        except RETRYABLE_ERRORS as e:
+            if attempt == LLM_MAX_RETRIES or not _is_retryable(e):
+                raise
+            delay = LLM_BACKOFF_BASE * (2 ** attempt)
+            await asyncio.sleep(delay + random.uniform(0, delay))
+
+
+async def _produce(client, messages, model, out):
+    try:
+        async with _semaphore:
+            stream = await _open_stream(client, messages, model)
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                token = chunk.choices[0].delta.content
+                if token:
+                    out.put(token)
+    except Exception as e:
+        out.put(e)
+    finally:
+        out.put(_DONE)
+
+
+def stream_chat(api_key, messages, model=None, base_url=None):
+    """Yield completion tokens as they arrive.
+
+    The request runs on the shared background loop, so this plain generator
+    can be handed straight to ``st.write_stream`` from any script thread.
+    """
+    loop = _get_loop()
+    client = get_client(api_key, base_url)
+    out = queue.Queue()
+    future = asyncio.run_coroutine_threadsafe(
+        _produce(client, messages, model or LLM_MODEL, out), loop
+    )
+
+    try:
+        while True:
+            item = out.get()
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Consumer went away (rerun / stop) before the stream finished.
+        if not future.done():
+            future.cancel()
@@ -0,0 +1,148 @@
+import cv2
+import numpy as np
+
+# Names used when the 3x3 region grid is reported to the agents
+ROW_NAMES = ("far", "middle", "near")
+COL_NAMES = ("left", "center", "right")
+
+
+def _frames(frame_ids, n, n_frames=None):
+    """Frame index per box and the number of frames; a single image is frame 0."""
+    if frame_ids is None:
+        return np.zeros(n, dtype=np.int64), 1
+    frame_ids = np.asarray(frame_ids, dtype=np.int64)
+    if n_frames is None:
+        n_frames = int(frame_ids.max()) + 1 if n else 0
+    return frame_ids, n_frames
+
+
+def _squeeze(out, frame_ids):
+    return out[0] if frame_ids is None else out
+
+
+def box_centers(boxes):
+    """(N, 4) xyxy -> (N, 2) box centers."""
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    return (boxes[:, :2] + boxes[:, 2:]) / 2
+
+
+def _cell_index(values, size, bins):
+    return np.clip((values / size * bins).astype(np.int64), 0, bins - 1)
+
+
+def density_heatmap(boxes, image_size, grid=(16, 16), frame_ids=None, n_frames=None):
+    """Count box centers per grid cell.
+
+    boxes: (N, 4) xyxy in pixels, image_size: (width, height), grid: (rows, cols).
+    Returns (rows, cols), or (frames, rows, cols) when ``frame_ids`` is given
+    for a batch or video; pass ``n_frames`` to keep trailing empty frames.
+    """
+    width, height = image_size
+    rows, cols = grid
+    centers = box_centers(boxes)
+    frames, n_frames = _frames(frame_ids, len(centers), n_frames)
+
+    gx = _cell_index(centers[:, 0], width, cols)
+    gy = _cell_index(centers[:, 1], height, rows)
+    flat = (frames * rows + gy) * cols + gx
+    heat = np.bincount(flat, minlength=n_frames * rows * cols).astype(np.float32)
+    return _squeeze(heat.reshape(n_frames, rows, cols), frame_ids)
+
+
+def occupancy_grid(boxes, image_size, grid=(8, 8), frame_ids=None, n_frames=None, subcells=8):
+    """Fraction of each grid cell covered by at least one box.
+
+    Boxes are rasterised on a grid ``subcells`` times finer per axis, so
+    overlapping boxes are counted once. Returns (rows, cols), or
+    (frames, rows, cols) when ``frame_ids`` is given.
+    """
+    width, height = image_size
+    rows, cols = grid
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    frames, n_frames = _frames(frame_ids, len(boxes), n_frames)
+    fine_r, fine_c = rows * subcells, cols * subcells
+
+    # A fine pixel is covered when its center lies inside the box
+    def edges(lo, hi, size, bins):
+        scale = bins / size
+        return (np.clip(np.ceil(lo * scale - 0.5), 0, bins).astype(np.int64),
+                np.clip(np.ceil(hi * scale - 0.5), 0, bins).astype(np.int64))
+
+    c0, c1 = edges(boxes[:, 0], boxes[:, 2], width, fine_c)
+    r0, r1 = edges(boxes[:, 1], boxes[:, 3], height, fine_r)
+
+    # 2-D difference array per frame: +1/-1 at the box corners, then prefix sums
+    stride_f, stride_r = (fine_r + 1) * (fine_c + 1), fine_c + 1
+    corners = np.concatenate([
+        frames * stride_f + r0 * stride_r + c0,
+        frames * stride_f + r0 * stride_r + c1,
+        frames * stride_f + r1 * stride_r + c0,
+        frames * stride_f + r1 * stride_r + c1,
+    ])
+    weights = np.concatenate([np.ones(len(boxes)), -np.ones(len(boxes)), -np.ones(len(boxes)), np.ones(len(boxes))])
+    diff = np.bincount(corners, weights, minlength=n_frames * stride_f).reshape(n_frames, fine_r + 1, fine_c + 1)
+    covered = diff.cumsum(axis=1).cumsum(axis=2)[:, :fine_r, :fine_c] > 0.5
+
+    coverage = covered.reshape(n_frames, rows, subcells, cols, subcells).mean(axis=(2, 4), dtype=np.float32)
+    return _squeeze(coverage, frame_ids)
+
+
+def region_counts(boxes, class_ids, image_size, regions=(3, 3), n_classes=None, frame_ids=None, n_frames=None):
+    """Per-class box counts for a rows x cols split of the frame.
+
+    Lanes are ``regions=(1, n_lanes)``. Returns (rows, cols, classes), or
+    (frames, rows, cols, classes) when ``frame_ids`` is given.
+    """
+    width, height = image_size
+    rows, cols = regions
+    class_ids = np.asarray(class_ids, dtype=np.int64)
+    n_classes = n_classes or (int(class_ids.max()) + 1 if len(class_ids) else 1)
+    centers = box_centers(boxes)
+    frames, n_frames = _frames(frame_ids, len(centers), n_frames)
+
+    gx = _cell_index(centers[:, 0], width, cols)
+    gy = _cell_index(centers[:, 1], height, rows)
+    flat = ((frames * rows + gy) * cols + gx) * n_classes + class_ids
+    counts = np.bincount(flat, minlength=n_frames * rows * cols * n_classes)
+    return _squeeze(counts.reshape(n_frames, rows, cols, n_classes), frame_ids)
+
+
+def scene_summary(boxes, class_ids, names, image_size, grid=(8, 8), n_lanes=3):
+    """Compact numeric description of one frame for the analysis agents."""
+    width, height = image_size
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    class_ids = np.asarray(class_ids, dtype=np.int64)
+    n_classes = max(names) + 1 if names else 1
+
+    occupancy = occupancy_grid(boxes, image_size, grid)
+    heat = density_heatmap(boxes, image_size, grid)
+    regions = region_counts(boxes, class_ids, image_size, (3, 3), n_classes).sum(axis=-1)
+    lanes = region_counts(boxes, class_ids, image_size, (1, n_lanes), n_classes)[0]
+
+    lane_names = COL_NAMES if n_lanes == 3 else [f"lane_{i + 1}" for i in range(n_lanes)]
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1]) / (width * height)
+    densest = np.unravel_index(np.argmax(regions), regions.shape)
+    class_totals = np.bincount(class_ids, minlength=n_classes)
+
+    return {
+        "total_objects": int(len(boxes)),
+        "class_counts": {names[int(c)]: int(class_totals[c]) for c in np.flatnonzero(class_totals)},
+        "occupancy_ratio": round(float(occupancy.mean()), 3),
+        "peak_cell_count": int(heat.max()) if len(boxes) else 0,
+        "occupied_cells": f"{int((heat > 0).sum())}/{heat.size}",
+        "densest_region": f"{ROW_NAMES[densest[0]]}-{COL_NAMES[densest[1]]}" if len(boxes) else None,
+        "mean_box_area_ratio": round(float(areas.mean()), 4) if len(boxes) else 0.0,
+        "lanes": {
+            lane_names[i]: {names[int(c)]: int(lanes[i, c]) for c in np.flatnonzero(lanes[i])}
+            for i in range(n_lanes)
+        },
+    }
+
+
+def render_heatmap(image, heat, alpha=0.45):
+    """Blend an upsampled heatmap over an RGB image."""
+    peak = float(heat.max())
+    scaled = (heat / peak * 255).astype(np.uint8) if peak > 0 else np.zeros_like(heat, dtype=np.uint8)
+    scaled = cv2.resize(scaled, (image.shape[1], image.shape[0]), interpolation=cv2.INTER_LINEAR)
+    colored = cv2.cvtColor(cv2.applyColorMap(scaled, cv2.COLORMAP_JET), cv2.COLOR_BGR2RGB)
+    return cv2.addWeighted(image, 1 - alpha, colored, alpha, 0)
@@ -24,13 +24,21 @@ os.system(f'kaggle datasets download -d {DATASET} -p {DATA_DIR} --unzip')
 print("✅ Dataset downloaded successfully.")
 
 # Prepare 10 sample images
-IMAGE_EXTS = {".jpg", ".jpeg", ".png"}
-all_images = [p for p in DATA_DIR.rglob("*") if p.suffix.lower() in IMAGE_EXTS]
-random.shuffle(all_images)
+MODEL_PATH = os.getenv("MODEL_PATH", "")
 
-selected = all_images[:10]
-for i, src in enumerate(selected, 1):
-    dst = SAMPLE_DIR / f"car_{i:02d}{src.suffix.lower()}"
-    shutil.copy2(src, dst)
+if MODEL_PATH and Path(MODEL_PATH).exists():
+    # A detector is available: pick the most informative images instead of random ones
+    from select_samples import select_samples
 
-print(f"✅ Copied {len(selected)} sample images to {SAMPLE_DIR}")
+    select_samples(MODEL_PATH, DATA_DIR, SAMPLE_DIR, k=10)
+else:
+    IMAGE_EXTS = {".jpg", ".jpeg", ".png"}
+    all_images = [p for p in DATA_DIR.rglob("*") if p.suffix.lower() in IMAGE_EXTS]
+    random.shuffle(all_images)
+
+    selected = all_images[:10]
+    for i, src in enumerate(selected, 1):
+        dst = SAMPLE_DIR / f"car_{i:02d}{src.suffix.lower()}"
+        shutil.copy2(src, dst)
+
+    print(f"✅ Copied {len(selected)} sample images to {SAMPLE_DIR}")
@@ -0,0 +1,99 @@
+# --- Inference Concurrency Benchmark ---
+# Compares the old setup (one shared in-process YOLO called from every
+# session thread) with the InferencePool as simulated users scale up.
+#
+#   python scripts/bench_inference_pool.py --users 1 2 4 8 16 32
+import os
+import sys
+import time
+import argparse
+import threading
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from inference_pool import InferencePool  # noqa: E402
+
+load_dotenv("api.env")
+
+MODEL_PATH = os.getenv("MODEL_PATH", "runs/detect/car_detector_v2/weights/best.pt")
+IMAGE_DIR = Path("data/samples")
+CONFIDENCE = 0.5
+
+
+def load_images(limit=10):
+    paths = sorted(p for p in IMAGE_DIR.iterdir() if p.suffix.lower() in {".jpg", ".jpeg", ".png"})
+    return [np.array(Image.open(p).convert("RGB")) for p in paths[:limit]]
+
+
+def run_users(predict, images, users, requests_per_user):
+    """Closed loop: each user sends its next request as soon as the last returns."""
+    latencies = [[] for _ in range(users)]
+
+    def user(idx):
+        for i in range(requests_per_user):
+            image = images[(idx + i) % len(images)]
+            start = time.perf_counter()
+            predict(image)
+            latencies[idx].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(users)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    lat = np.concatenate([np.asarray(l) for l in latencies]) * 1000
+    return {
+        "throughput": len(lat) / wall,
+        "p50": np.percentile(lat, 50),
+        "p95": np.percentile(lat, 95),
+        "p99": np.percentile(lat, 99),
+    }
+
+
+def print_row(mode, users, stats):
+    print(f"{mode:<8}{users:>6}{stats['throughput']:>12.2f}"
+          f"{stats['p50']:>10.0f}{stats['p95']:>10.0f}{stats['p99']:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark YOLO inference under concurrent users")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--requests", type=int, default=8, help="requests per user")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=None, help="torch threads per worker")
+    parser.add_argument("--skip-shared", action="store_true", help="only benchmark the pool")
+    args = parser.parse_args()
+
+    images = load_images()
+    print(f"🖼 {len(images)} images from {IMAGE_DIR}, {args.requests} requests per user")
+    print(f"{'mode':<8}{'users':>6}{'img/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+
+    if not args.skip_shared:
+        from ultralytics import YOLO
+
+        model = YOLO(MODEL_PATH)
+        model(images[0], conf=CONFIDENCE, verbose=False)
+        for users in args.users:
+            stats = run_users(lambda img: model(img, conf=CONFIDENCE, verbose=False), images, users, args.requests)
+            print_row("shared", users, stats)
+
+    pool = InferencePool(MODEL_PATH, workers=args.workers, threads=args.threads)
+    print(f"⚙️ pool: {len(pool.shares)} workers x {len(pool.shares[0])} threads")
+    # Warm the workers so model loading is not counted
+    for f in [pool.submit(images[0], CONFIDENCE) for _ in range(len(pool.shares) * 2)]:
+        f.result()
+    for users in args.users:
+        stats = run_users(lambda img: pool.predict(img, conf=CONFIDENCE), images, users, args.requests)
+        print_row("pool", users, stats)
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -46,6 +46,12 @@ def convert_and_save(items, split):
         width = item["file_metadata"]["image_width"]
         height = item["file_metadata"]["image_height"]
 
+        # --- Never annotated: leave it out rather than train on it as "no cars" ---
+        answers = item.get("latest_answer") or []
+        if not answers:
+            print(f"⚠️ Not annotated, skipping: {file_name}")
+            continue
+
         # --- Copy image ---
         src = IMAGE_SOURCE_DIR / file_name
         dst = YOLO_DATA_DIR / "images" / split / file_name
@@ -58,7 +64,7 @@ def convert_and_save(items, split):
         label_path = YOLO_DATA_DIR / "labels" / split / f"{Path(file_name).stem}.txt"
         lines = []
 
-        for ans_group in item.get("latest_answer", []):
+        for ans_group in answers:
             for ann in ans_group.get("answer", []):
                 label = ann.get("label")
                 if label != "Car":  # ✅ Only keep Car detections
@@ -67,14 +73,24 @@ def convert_and_save(items, split):
                 cls_id = CLASS_MAP["Car"]
                 bbox = ann["answer"]
 
+                # --- Clip to the image so normalized coords stay in [0, 1] ---
+                xmin, xmax = max(0, bbox["xmin"]), min(width, bbox["xmax"])
+                ymin, ymax = max(0, bbox["ymin"]), min(height, bbox["ymax"])
+                if xmax <= xmin or ymax <= ymin:
+                    print(f"⚠️ Skipping degenerate box in {file_name}: {bbox}")
+                    continue
+
                 # --- YOLO normalized format ---
-                x_center = ((bbox["xmin"] + bbox["xmax"]) / 2) / width
-                y_center = ((bbox["ymin"] + bbox["ymax"]) / 2) / height
-                w = (bbox["xmax"] - bbox["xmin"]) / width
-                h = (bbox["ymax"] - bbox["ymin"]) / height
+                x_center = ((xmin + xmax) / 2) / width
+                y_center = ((ymin + ymax) / 2) / height
+                w = (xmax - xmin) / width
+                h = (ymax - ymin) / height
 
                 lines.append(f"{cls_id} {x_center:.6f} {y_center:.6f} {w:.6f} {h:.6f}")
 
+        if not lines:
+            print(f"⚠️ Annotated but no Car boxes in {file_name}, writing empty label (background image)")
+
         # Save labels
         with open(label_path, "w", encoding="utf-8") as f:
             f.write("\n".join(lines))
@@ -87,4 +103,5 @@ convert_and_save(val_data, "val")
 
 print("\n🎯 YOLO dataset successfully created at:", YOLO_DATA_DIR)
 print("📁 Classes:", CLASS_MAP)
+print("👉 Check labels with: python scripts/validate_yolo_labels.py", YOLO_DATA_DIR)
 print("🚀 Ready to train your YOLOv8 model!")
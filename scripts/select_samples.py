@@ -0,0 +1,159 @@
+# --- Active-Learning Sample Selection ---
+# Runs the current detector over the unlabeled pool and copies the top-K most
+# informative images into the Labellerr upload folder (data/samples).
+#
+#   python scripts/select_samples.py --k 10
+import os
+import shutil
+import argparse
+from pathlib import Path
+
+import cv2
+import numpy as np
+from dotenv import load_dotenv
+from sklearn.cluster import KMeans
+
+load_dotenv("api.env")
+
+MODEL_PATH = os.getenv("MODEL_PATH", "runs/detect/car_detector_v2/weights/best.pt")
+POOL_DIR = Path("data/raw")
+SAMPLE_DIR = Path("data/samples")
+IMAGE_EXTS = {".jpg", ".jpeg", ".png"}
+
+LOW_CONF = 0.1      # keep weak boxes, they carry most of the uncertainty
+BATCH_SIZE = 16
+
+
+def box_iou(a, b):
+    """Pairwise IoU between (N, 4) and (M, 4) xyxy boxes."""
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(br - tl, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def margin_score(confidences):
+    """1 at conf 0.5 (coin flip), 0 at conf 0 or 1; averaged over boxes."""
+    if len(confidences) == 0:
+        return 0.0
+    return float(np.mean(1 - np.abs(2 * confidences - 1)))
+
+
+def tta_disagreement(boxes, flipped_boxes, width):
+    """1 - mean best-match IoU between predictions on the image and its mirror."""
+    if len(boxes) == 0 and len(flipped_boxes) == 0:
+        return 0.0
+    if len(boxes) == 0 or len(flipped_boxes) == 0:
+        return 1.0
+    # Map the mirrored predictions back into the original frame
+    unflipped = flipped_boxes.copy()
+    unflipped[:, 0] = width - flipped_boxes[:, 2]
+    unflipped[:, 2] = width - flipped_boxes[:, 0]
+    iou = box_iou(boxes, unflipped)
+    matched = iou.max(axis=1).sum() + iou.max(axis=0).sum()
+    return float(1 - matched / (len(boxes) + len(unflipped)))
+
+
+def score_pool(model, paths, batch_size=BATCH_SIZE):
+    """Return (scored_paths, uncertainty, embeddings); unreadable images are skipped."""
+    scored, uncertainty, embeddings = [], [], []
+
+    for start in range(0, len(paths), batch_size):
+        batch_paths, images = [], []
+        for p in paths[start:start + batch_size]:
+            img = cv2.imread(str(p))
+            if img is None:
+                print(f"⚠️ Skipping unreadable image: {p}")
+                continue
+            batch_paths.append(p)
+            images.append(img)
+        if not images:
+            continue
+        flipped = [np.ascontiguousarray(img[:, ::-1]) for img in images]
+
+        results = model(images + flipped, conf=LOW_CONF, verbose=False)
+        embeddings.extend(e.cpu().numpy() for e in model.embed(images, verbose=False))
+
+        for i, img in enumerate(images):
+            plain, mirror = results[i].boxes, results[i + len(images)].boxes
+            confs = plain.conf.cpu().numpy()
+            uncertainty.append(0.5 * margin_score(confs) + 0.5 * tta_disagreement(
+                plain.xyxy.cpu().numpy(), mirror.xyxy.cpu().numpy(), img.shape[1]
+            ))
+        scored.extend(batch_paths)
+
+        print(f"🔍 Scored {min(start + batch_size, len(paths))}/{len(paths)} images")
+
+    if not scored:
+        return [], np.zeros(0, dtype=np.float32), np.zeros((0, 0), dtype=np.float32)
+    return scored, np.asarray(uncertainty, dtype=np.float32), np.stack(embeddings)
+
+
+def pick_diverse(uncertainty, embeddings, k):
+    """Cluster the embeddings into k groups and take the most uncertain image of each."""
+    if len(uncertainty) <= k:
+        return list(np.argsort(-uncertainty))
+    feats = embeddings / (np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-9)
+    # Fewer distinct embeddings than k leaves some clusters empty
+    n_clusters = min(k, len(np.unique(feats.round(6), axis=0)))
+    labels = KMeans(n_clusters=n_clusters, n_init=10, random_state=42).fit_predict(feats)
+
+    picks = []
+    for c in range(n_clusters):
+        members = np.flatnonzero(labels == c)
+        if len(members):
+            picks.append(int(members[np.argmax(uncertainty[members])]))
+
+    # Top up with the most uncertain remaining images if clusters came up short
+    chosen = set(picks)
+    for i in np.argsort(-uncertainty):
+        if len(picks) >= k:
+            break
+        if int(i) not in chosen:
+            picks.append(int(i))
+    return sorted(picks, key=lambda i: -uncertainty[i])
+
+
+def select_samples(model_path=MODEL_PATH, pool_dir=POOL_DIR, out_dir=SAMPLE_DIR, k=10, batch_size=BATCH_SIZE):
+    from ultralytics import YOLO
+
+    paths = sorted(p for p in Path(pool_dir).rglob("*") if p.suffix.lower() in IMAGE_EXTS)
+    if not paths:
+        raise FileNotFoundError(f"❌ No images found in {pool_dir}")
+    print(f"📦 Scoring {len(paths)} pool images with {model_path}")
+
+    model = YOLO(model_path)
+    paths, uncertainty, embeddings = score_pool(model, paths, batch_size)
+    if not paths:
+        raise FileNotFoundError(f"❌ No readable images in {pool_dir}")
+    selected = pick_diverse(uncertainty, embeddings, k)
+
+    # The upload step sends the whole folder, so drop the previous round first
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for old in out_dir.iterdir():
+        if old.suffix.lower() in IMAGE_EXTS:
+            old.unlink()
+
+    for rank, idx in enumerate(selected, 1):
+        src = paths[idx]
+        dst = out_dir / f"car_{rank:02d}{src.suffix.lower()}"
+        shutil.copy2(src, dst)
+        print(f"  {dst.name}  score={uncertainty[idx]:.3f}  ← {src.name}")
+
+    print(f"✅ Copied {len(selected)} selected images to {out_dir}")
+    return [paths[i] for i in selected]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pick the most informative images for annotation")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--pool", default=str(POOL_DIR))
+    parser.add_argument("--out", default=str(SAMPLE_DIR))
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    select_samples(args.model, args.pool, args.out, args.k, args.batch)
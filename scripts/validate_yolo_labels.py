@@ -0,0 +1,304 @@
+# --- YOLO Label Validation & Repair ---
+# Loads every label file under a dataset root into one NumPy array and checks
+# coordinates, box areas, duplicates, class ids and image/label pairing.
+#
+#   python scripts/validate_yolo_labels.py "data/raw/Cars Detection" --names Ambulance Bus Car Motorcycle Truck
+#   python scripts/validate_yolo_labels.py data/processed/yolo_car_dataset --fix
+#
+# --fix clips boxes, drops non-finite/duplicate/degenerate ones and moves orphan
+# labels aside. Images without labels are only reported (Ultralytics already
+# trains on them as background); --write-empty-labels creates empty labels for
+# them. Boxes with unknown class ids are only dropped with --drop-unknown, and
+# only when the class names were given explicitly (--names or data.yaml).
+import os
+import sys
+import shutil
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+DATASET_DIR = Path("data/raw/Cars Detection")
+ORPHAN_DIR_NAME = "orphan_labels"
+CLASS_NAMES = ["Car"]
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+
+EPS = 1e-6
+MAX_EXAMPLES = 5
+
+# Odd 64-bit constants for hashing (file, cls, cx, cy, w, h) rows
+_HASH_MULTIPLIERS = np.array([
+    0x9E3779B97F4A7C15, 0xBF58476D1CE4E5B9, 0x94D049BB133111EB,
+    0x2545F4914F6CDD1D, 0xD6E8FEB86659FD93, 0xA0761D6478BD642F,
+], dtype=np.uint64)
+
+
+def label_path_for(image_path):
+    """Ultralytics pairing rule: last 'images' dir -> 'labels', suffix -> .txt."""
+    parts = list(image_path.parts)
+    idx = len(parts) - 1 - parts[::-1].index("images")
+    parts[idx] = "labels"
+    return Path(*parts).with_suffix(".txt")
+
+
+def find_files(root):
+    images = [p for p in root.rglob("*") if p.suffix.lower() in IMAGE_EXTS and "images" in p.parts]
+    labels = [p for p in root.rglob("*.txt") if "labels" in p.parts]
+    return images, labels
+
+
+def _read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _parse(texts):
+    joined = " ".join(texts)
+    return np.fromstring(joined, sep=" ") if joined.strip() else np.zeros(0)
+
+
+def _line_fields(text):
+    """(non-empty line count, whether every such line has exactly 5 fields)."""
+    counts = [n for n in map(len, map(str.split, text.splitlines())) if n]
+    return len(counts), all(n == 5 for n in counts)
+
+
+def load_labels(paths, workers=None):
+    """Read all label files in parallel and parse them into one (N, 5) array.
+
+    Returns (rows, file_idx, malformed) where rows are [cls, cx, cy, w, h],
+    file_idx maps each row to its file, and malformed is a bool per file for
+    files whose lines are not all 5 numeric fields (those are left out).
+    """
+    workers = workers or min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        texts = list(pool.map(_read, paths))
+
+    fields = [_line_fields(t) for t in texts]
+    n_lines = np.array([n for n, _ in fields], dtype=np.int64)
+    malformed = np.array([not ok for _, ok in fields], dtype=bool)
+
+    try:
+        values = _parse(t for t, bad in zip(texts, malformed) if not bad)
+    except ValueError:
+        # Non-numeric token somewhere: parse file by file to find it
+        for i, t in enumerate(texts):
+            try:
+                _parse([t])
+            except ValueError:
+                malformed[i] = True
+        values = _parse(t for t, bad in zip(texts, malformed) if not bad)
+
+    rows = values.reshape(-1, 5)
+    file_idx = np.repeat(np.arange(len(paths)), np.where(malformed, 0, n_lines))
+    return rows, file_idx, malformed
+
+
+def check_rows(rows, file_idx, n_classes):
+    """Vectorized per-box checks. Returns a dict of bool masks over rows."""
+    # NaN compares False against everything, so flag non-finite rows up front
+    # and zero them for the other checks (which then skip them)
+    finite = np.isfinite(rows).all(axis=1)
+    rows = np.where(finite[:, None], rows, 0.0)
+    cls, cx, cy, w, h = rows.T
+    x1, y1, x2, y2 = cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2
+
+    issues = {
+        "non_finite": ~finite,
+        "unknown_class": finite & ((cls != np.round(cls)) | (cls < 0) | (cls >= n_classes)),
+        "out_of_range": finite & (
+            (np.minimum.reduce([x1, y1]) < -EPS)
+            | (np.maximum.reduce([x2, y2]) > 1 + EPS)
+            | (np.minimum.reduce([cx, cy, w, h]) < -EPS)
+        ),
+        "zero_area": finite & ((w <= EPS) | (h <= EPS)),
+    }
+
+    # Duplicates: identical (file, class, box) after rounding; keep the first.
+    # Sort on a 1-D hash of the key (much cheaper than a 6-column lexsort),
+    # then confirm neighbours on the full key so collisions are never flagged.
+    idx = np.flatnonzero(finite)
+    keys = np.column_stack([file_idx[idx], np.round(rows[idx] * 1e6).astype(np.int64)])
+    hashed = (keys.astype(np.uint64) * _HASH_MULTIPLIERS).sum(axis=1)
+    order = np.argsort(hashed, kind="stable")
+    sorted_keys = keys[order]
+    same = np.all(sorted_keys[1:] == sorted_keys[:-1], axis=1)
+    duplicate = np.zeros(len(rows), dtype=bool)
+    duplicate[idx[order[1:][same]]] = True
+    issues["duplicate"] = duplicate
+    return issues
+
+
+def repair_rows(rows, issues, drop_unknown=False):
+    """Clip boxes into the image, then drop non-finite, duplicate and degenerate ones.
+
+    Unknown-class boxes are kept unless ``drop_unknown`` is set.
+    """
+    rows = np.where(issues["non_finite"][:, None], 0.0, rows)
+    cls, cx, cy, w, h = rows.T
+    x1 = np.clip(cx - w / 2, 0, 1)
+    y1 = np.clip(cy - h / 2, 0, 1)
+    x2 = np.clip(cx + w / 2, 0, 1)
+    y2 = np.clip(cy + h / 2, 0, 1)
+    fixed = np.column_stack([cls, (x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1])
+
+    keep = ~(issues["duplicate"] | issues["non_finite"])
+    if drop_unknown:
+        keep &= ~issues["unknown_class"]
+    keep &= (fixed[:, 3] > EPS) & (fixed[:, 4] > EPS)
+    return fixed, keep
+
+
+def write_labels(paths, rows, file_idx, keep, changed_files, workers=None):
+    # file_idx is sorted, so each file's rows are one contiguous slice
+    starts = np.searchsorted(file_idx, changed_files, side="left")
+    ends = np.searchsorted(file_idx, changed_files, side="right")
+
+    def write(job):
+        i, lo, hi = job
+        lines = [f"{int(r[0])} {r[1]:.6f} {r[2]:.6f} {r[3]:.6f} {r[4]:.6f}" for r in rows[lo:hi][keep[lo:hi]]]
+        with open(paths[i], "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + ("\n" if lines else ""))
+
+    workers = workers or min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(write, zip(changed_files, starts, ends)))
+
+
+def load_class_names(root):
+    """Return (names, source); source says where the names came from."""
+    data_yaml = root / "data.yaml"
+    if data_yaml.exists():
+        import yaml
+
+        with open(data_yaml, "r", encoding="utf-8") as f:
+            names = yaml.safe_load(f).get("names")
+        if isinstance(names, dict):
+            names = [names[k] for k in sorted(names)]
+        if names:
+            return list(names), str(data_yaml)
+    return CLASS_NAMES, "default CLASS_NAMES"
+
+
+def report(name, total, examples):
+    if total == 0:
+        return
+    print(f"⚠️ {name}: {total}")
+    for item in examples[:MAX_EXAMPLES]:
+        print(f"    {item}")
+    if total > MAX_EXAMPLES:
+        print(f"    ... {total - MAX_EXAMPLES} more")
+
+
+def orphan_destination(root, label_path):
+    """Flattened path under <root>/orphan_labels, outside any 'labels' dir."""
+    rel = label_path.relative_to(root)
+    return root / ORPHAN_DIR_NAME / "__".join(rel.parts)
+
+
+def fix_pairing(root, missing_labels, orphans, write_empty=False):
+    """Move orphan labels aside; write empty labels only when asked to."""
+    if write_empty:
+        for image in missing_labels:
+            label = label_path_for(image)
+            label.parent.mkdir(parents=True, exist_ok=True)
+            label.touch()
+    for label in orphans:
+        dst = orphan_destination(root, label)
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(label), str(dst))
+
+
+def validate(root=DATASET_DIR, class_names=None, fix=False, drop_unknown=False, write_empty=False):
+    root = Path(root)
+    if class_names:
+        names_source = "--names"
+    else:
+        class_names, names_source = load_class_names(root)
+    if fix and drop_unknown and names_source.startswith("default"):
+        print("❌ --drop-unknown needs explicit class names (--names or data.yaml); "
+              f"refusing to delete boxes based on {names_source} {CLASS_NAMES}")
+        return 2
+    start = time.perf_counter()
+
+    images, labels = find_files(root)
+    expected = {label_path_for(p) for p in images}
+    label_set = set(labels)
+    rows, file_idx, malformed = load_labels(labels)
+    issues = check_rows(rows, file_idx, len(class_names))
+    elapsed = time.perf_counter() - start
+
+    print(f"📂 {root}: {len(images)} images, {len(labels)} label files, {len(rows)} boxes")
+    print(f"📁 Classes ({names_source}): {dict(enumerate(class_names))}")
+    print(f"⏱ Loaded and checked in {elapsed * 1000:.0f} ms")
+
+    def box_examples(mask):
+        return [f"{labels[file_idx[i]]}: {' '.join(f'{v:g}' for v in rows[i])}"
+                for i in np.flatnonzero(mask)[:MAX_EXAMPLES]]
+
+    def file_report(name, paths):
+        report(name, len(paths), [str(p) for p in paths[:MAX_EXAMPLES]])
+
+    counts = np.bincount(file_idx, minlength=len(labels))
+    empty = [labels[i] for i in np.flatnonzero((counts == 0) & ~malformed)]
+    unknown_ids = np.unique(rows[issues["unknown_class"], 0])
+    if len(unknown_ids):
+        print(f"⚠️ Class ids not in class names from {names_source}: {unknown_ids.astype(int).tolist()}")
+
+    missing_labels = sorted(p for p in images if label_path_for(p) not in label_set)
+    orphans = sorted(p for p in labels if p not in expected)
+
+    for name, mask in issues.items():
+        report(name.replace("_", " ").capitalize() + " boxes", int(mask.sum()), box_examples(mask))
+    file_report("Malformed label files", [labels[i] for i in np.flatnonzero(malformed)])
+    file_report("Empty label files", empty)
+    file_report("Images without labels", missing_labels)
+    file_report("Labels without images", orphans)
+
+    bad_boxes = np.logical_or.reduce(list(issues.values())) if len(rows) else np.zeros(0, dtype=bool)
+    if not (bad_boxes.any() or malformed.any() or missing_labels or orphans):
+        print("✅ All labels valid.")
+        return 0
+
+    if fix:
+        # Rewrite only files with boxes the repair actually changes
+        to_repair = issues["non_finite"] | issues["out_of_range"] | issues["zero_area"] | issues["duplicate"]
+        if drop_unknown:
+            to_repair |= issues["unknown_class"]
+        fixed, keep = repair_rows(rows, issues, drop_unknown)
+        changed = np.unique(file_idx[to_repair])
+        write_labels(labels, fixed, file_idx, keep, changed)
+        fix_pairing(root, missing_labels, orphans, write_empty)
+
+        print(f"🛠 Rewrote {len(changed)} label files, dropped {int((~keep).sum())} boxes")
+        if missing_labels and write_empty:
+            print(f"🛠 Wrote {len(missing_labels)} empty labels for unlabeled images (background)")
+        elif missing_labels:
+            print("👉 Images without labels were left as is; annotate them, or pass "
+                  "--write-empty-labels if they really contain no objects")
+        if orphans:
+            print(f"🛠 Moved {len(orphans)} orphan labels to {root / ORPHAN_DIR_NAME}")
+        if issues["unknown_class"].any() and not drop_unknown:
+            print("👉 Unknown-class boxes were kept; pass the real --names, or --drop-unknown to remove them")
+        if malformed.any():
+            print("👉 Malformed files were left for manual review")
+        if empty:
+            print("👉 Empty label files were kept as background images")
+    return 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate (and optionally repair) YOLO label files")
+    parser.add_argument("root", nargs="?", default=str(DATASET_DIR))
+    parser.add_argument("--names", nargs="+", help="class names; defaults to data.yaml or CLASS_NAMES")
+    parser.add_argument("--fix", action="store_true",
+                        help="clip boxes, drop bad ones and move orphan labels aside in place")
+    parser.add_argument("--drop-unknown", action="store_true",
+                        help="with --fix, also drop unknown-class boxes (needs --names or data.yaml)")
+    parser.add_argument("--write-empty-labels", action="store_true",
+                        help="with --fix, write empty labels for images that have none")
+    args = parser.parse_args()
+
+    sys.exit(validate(args.root, args.names, args.fix, args.drop_unknown, args.write_empty_labels))
@@ -0,0 +1,100 @@
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Generic, Hashable, List, Optional, TypeVar
+
+import numpy as np
+import streamlit as st
+
+T = TypeVar("T")
+
+_STORE_KEY = "scene_store"
+_UNSET = object()
+
+
+@dataclass
+class Stage(Generic[T]):
+    """One cached artifact plus the key of the inputs it was built from."""
+    key: Hashable = _UNSET
+    value: Optional[T] = None
+
+    def is_current(self, key: Hashable) -> bool:
+        return self.key is not _UNSET and self.key == key
+
+    def get(self, key: Hashable, compute: Callable[[], T]) -> T:
+        if not self.is_current(key):
+            self.value = compute()
+            self.key = key
+        return self.value
+
+    def clear(self) -> None:
+        self.key = _UNSET
+        self.value = None
+
+
+@dataclass
+class Detection:
+    """Raw detection arrays for one image at one confidence threshold."""
+    boxes: np.ndarray          # (N, 4) xyxy in pixels
+    confidences: np.ndarray    # (N,)
+    class_ids: np.ndarray      # (N,) int
+    names: Dict[int, str]
+    plot: np.ndarray           # annotated image from results[0].plot()
+
+    def counts(self) -> Dict[str, int]:
+        ids, cnt = np.unique(self.class_ids, return_counts=True)
+        return {self.names[int(i)]: int(c) for i, c in zip(ids, cnt)}
+
+    def confidence_scores(self) -> Dict[str, List[float]]:
+        scores = {}
+        for cls_id, conf in zip(self.class_ids.tolist(), self.confidences.tolist()):
+            scores.setdefault(self.names[int(cls_id)], []).append(conf)
+        return scores
+
+
+@dataclass
+class Rendered:
+    """Display-ready images and the encoded bytes used by the export button."""
+    original: np.ndarray
+    result: np.ndarray
+    jpeg_bytes: bytes
+
+
+@dataclass
+class SpatialAnalytics:
+    """Grids from scene_analytics plus the compact summary fed to the agents."""
+    summary: Dict[str, Any]
+    heatmap: np.ndarray
+    occupancy: np.ndarray
+
+
+@dataclass
+class SessionStore:
+    """Per-session artifacts, each invalidated only by the inputs it depends on.
+
+    image      <- image bytes
+    detection  <- image hash, confidence threshold
+    rendered   <- detection key, resize option
+    spatial    <- detection key
+    analysis   <- spatial summary, API key
+    """
+    image_hash: Optional[str] = None
+    image: Stage[np.ndarray] = field(default_factory=Stage)
+    detection: Stage[Detection] = field(default_factory=Stage)
+    rendered: Stage[Rendered] = field(default_factory=Stage)
+    spatial: Stage[SpatialAnalytics] = field(default_factory=Stage)
+    analysis: Stage[Dict[str, Any]] = field(default_factory=Stage)
+
+    def clear(self) -> None:
+        self.image_hash = None
+        for stage in (self.image, self.detection, self.rendered, self.spatial, self.analysis):
+            stage.clear()
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+def get_store() -> SessionStore:
+    if _STORE_KEY not in st.session_state:
+        st.session_state[_STORE_KEY] = SessionStore()
+    return st.session_state[_STORE_KEY]